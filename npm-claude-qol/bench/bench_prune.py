@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Nash transcript pruner on synthetic sessions.
+
+Usage:
+    python3 bench_prune.py [--sizes 1MB,10MB,100MB] [--modes tiers,dedup,...]
+                           [--data-dir DIR] [--seed N] [--json]
+
+For each size tier a deterministic session is generated (and reused from
+--data-dir on later runs), then each mode is run in a fresh subprocess so
+peak RSS is measured per run. Reports MB/s, peak RSS, output reduction and
+prune_to_file()'s status. The incremental mode prunes the first
+INCREMENTAL_PREFIX of the session untimed (more if that prefix would fall in
+a smaller size tier), appends the rest and times only the resumed call; its
+MB/s is over the appended bytes.
+1GB is supported but not in the defaults: pass --sizes 1GB explicitly.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "skills", "nash"))
+
+from gen_session import generate, parse_size  # noqa: E402
+
+
+DEFAULT_SIZES = ("1MB", "10MB", "100MB")
+
+# mode name -> prune_to_file() keyword options
+MODES = {
+    "tiers": {},
+    "dedup": {"dedup": True},
+    "compact": {"fmt": "compact"},
+    "budget": {"target_bytes": 800_000},
+    "budget+dedup+compact": {"target_bytes": 800_000, "dedup": True, "fmt": "compact"},
+    "incremental": {"incremental": True},
+}
+
+# Share of the session already pruned before the timed incremental call
+INCREMENTAL_PREFIX = 0.9
+
+
+def ensure_session(data_dir, size_label, seed):
+    """Generate (once) and return the path of the session for a size tier."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"session-{size_label}-seed{seed}.jsonl")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            generate(parse_size(size_label), f, seed)
+        os.replace(tmp_path, path)
+    return path
+
+
+def split_at_line(filepath, fraction, tier_for_size):
+    """Byte offset of the first line boundary at or after fraction of the
+    file, moved forward if needed so the prefix falls in the same size tier
+    as the whole file (a tier change forces a rebuild, not a resume). When
+    that would leave almost nothing to append, the split stays put and the
+    run reports 'rebuilt'."""
+    size = os.path.getsize(filepath)
+    offset = int(size * fraction)
+    if tier_for_size(offset) != tier_for_size(size):
+        lo, hi = offset, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tier_for_size(mid) == tier_for_size(size):
+                hi = mid
+            else:
+                lo = mid + 1
+        if size - lo >= (size - offset) // 10:
+            offset = lo
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        f.readline()
+        return f.tell()
+
+
+def run_child(filepath, mode):
+    """Prune once in this process and print timing/RSS as JSON."""
+    import prune_transcript
+
+    with tempfile.TemporaryDirectory() as outdir:
+        in_bytes = None
+        if MODES[mode].get("incremental"):
+            # Resume path: checkpoint a prefix, then time only the catch-up
+            split = split_at_line(filepath, INCREMENTAL_PREFIX, prune_transcript.tier_for_size)
+            live_path = os.path.join(outdir, os.path.basename(filepath))
+            with open(filepath, "rb") as src, open(live_path, "wb") as dst:
+                dst.write(src.read(split))
+            prune_transcript.prune_to_file(live_path, outdir, **MODES[mode])
+            with open(filepath, "rb") as src, open(live_path, "ab") as dst:
+                src.seek(split)
+                shutil.copyfileobj(src, dst)
+            in_bytes = os.path.getsize(filepath) - split
+            filepath = live_path
+
+        started = time.perf_counter()
+        orig_size, new_size, _, status = prune_transcript.prune_to_file(
+            filepath, outdir, **MODES[mode]
+        )
+        elapsed = time.perf_counter() - started
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        rss *= 1024
+    print(json.dumps({
+        "in_bytes": orig_size,
+        "timed_bytes": orig_size if in_bytes is None else in_bytes,
+        "out_bytes": new_size,
+        "seconds": elapsed,
+        "peak_rss": rss,
+        "status": status,
+    }))
+
+
+def run_mode(filepath, mode):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", filepath, mode],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prune_transcript.py.")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES))
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "nash-bench"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", nargs=2, metavar=("FILE", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)} (choose from {', '.join(MODES)})")
+
+    results = []
+    if not args.json:
+        print(
+            f"{'size':>6} {'mode':<22} {'sec':>8} {'MB/s':>8} {'RSS MB':>8} "
+            f"{'out MB':>8} {'reduct':>7}  status"
+        )
+    for size_label in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        filepath = ensure_session(args.data_dir, size_label, args.seed)
+        for mode in modes:
+            r = run_mode(filepath, mode)
+            r.update(size=size_label, mode=mode)
+            r["mb_per_s"] = r["timed_bytes"] / 1_000_000 / r["seconds"] if r["seconds"] > 0 else 0
+            r["reduction"] = 1 - r["out_bytes"] / r["in_bytes"] if r["in_bytes"] else 0
+            results.append(r)
+            if not args.json:
+                print(
+                    f"{size_label:>6} {mode:<22} {r['seconds']:>8.2f} {r['mb_per_s']:>8.1f} "
+                    f"{r['peak_rss'] / 1_000_000:>8.1f} {r['out_bytes'] / 1_000_000:>8.2f} "
+                    f"{r['reduction'] * 100:>6.1f}%  {r['status'] or '-'}"
+                )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
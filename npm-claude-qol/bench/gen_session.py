@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator of synthetic Claude Code session JSONL, for
+benchmarking the Nash transcript pruner.
+
+Usage:
+    python3 gen_session.py <size> <output_file> [--seed N]
+
+    size: bytes, or with a suffix — 1MB, 10MB, 100MB, 1GB
+
+The same size and seed always produce the same bytes. Output mixes the
+event kinds the pruner handles: user prompts (some invoking slash
+commands), assistant text, tool_use calls, tool_results (in assistant and
+user events, with occasional errors), and progress/system/
+file-history-snapshot metadata. Files are re-read and commands re-run
+throughout, so dedup has realistic repeats to find, and exploratory
+Read/Grep/Glob runs give aggressive mode something to collapse.
+"""
+
+import argparse
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+
+SIZE_SUFFIXES = {"KB": 1_000, "MB": 1_000_000, "GB": 1_000_000_000}
+
+WORDS = (
+    "the test fails because config loader returns none when env var is unset "
+    "we should check the handler update schema migrate route component render "
+    "state props hook build lint error warning import module function class "
+    "retry timeout cache index query session token budget prune stream parse"
+).split()
+
+COMMANDS = ("dev-story", "code-review", "implement-epic", "designer-founder", "nash")
+BASH_COMMANDS = (
+    "npm test", "npm run lint", "npm run build", "git status", "git diff",
+    "pytest -q", "ls -la src", "git log --oneline -20",
+)
+EXPLORE_TOOLS = ("Read", "Grep", "Glob")
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    for suffix, factor in SIZE_SUFFIXES.items():
+        if text.endswith(suffix):
+            return int(float(text[: -len(suffix)]) * factor)
+    return int(text)
+
+
+class SessionGenerator:
+    """Produces one event dict at a time, advancing a simulated clock."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.session_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        self.clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.parent = None
+        self.files = [f"src/module_{i}.py" for i in range(60)]
+        # Stable per-file contents so repeated Reads return identical results
+        self.file_bodies = {path: self.code_block(self.rng.randint(20, 400)) for path in self.files}
+
+    def words(self, n):
+        return " ".join(self.rng.choice(WORDS) for _ in range(n))
+
+    def code_block(self, lines):
+        return "\n".join(
+            f"{i:>4}\t    {self.words(self.rng.randint(3, 12))}" for i in range(1, lines + 1)
+        )
+
+    def envelope(self, event_type, message=None, **extra):
+        self.clock += timedelta(milliseconds=self.rng.randint(200, 20_000))
+        event_uuid = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        event = {
+            "parentUuid": self.parent,
+            "isSidechain": False,
+            "userType": "external",
+            "cwd": "/home/dev/Coding/project",
+            "sessionId": self.session_id,
+            "version": "2.0.0",
+            "gitBranch": "main",
+            "type": event_type,
+        }
+        if message is not None:
+            event["message"] = message
+        event.update(extra)
+        event["uuid"] = event_uuid
+        event["timestamp"] = self.clock.isoformat().replace("+00:00", "Z")
+        self.parent = event_uuid
+        return event
+
+    def assistant(self, content):
+        return self.envelope("assistant", {
+            "id": f"msg_{self.rng.getrandbits(64):016x}",
+            "type": "message",
+            "role": "assistant",
+            "model": "claude-synthetic",
+            "content": content,
+            "stop_reason": None,
+            "usage": {"input_tokens": self.rng.randint(1, 9), "output_tokens": self.rng.randint(1, 900)},
+        }, requestId=f"req_{self.rng.getrandbits(64):016x}")
+
+    def tool_use(self, name):
+        tool_id = f"toolu_{self.rng.getrandbits(64):016x}"
+        if name == "Read":
+            inp = {"file_path": self.rng.choice(self.files)}
+        elif name == "Grep":
+            inp = {"pattern": self.rng.choice(WORDS), "path": "src"}
+        elif name == "Glob":
+            inp = {"pattern": f"src/**/*{self.rng.choice(WORDS)}*.py"}
+        elif name == "Bash":
+            inp = {"command": self.rng.choice(BASH_COMMANDS), "description": self.words(4)}
+        elif name == "Write":
+            inp = {"file_path": self.rng.choice(self.files), "content": self.code_block(self.rng.randint(20, 300))}
+        elif name == "Edit":
+            inp = {
+                "file_path": self.rng.choice(self.files),
+                "old_string": self.code_block(self.rng.randint(1, 30)),
+                "new_string": self.code_block(self.rng.randint(1, 30)),
+            }
+        else:  # Task
+            inp = {"subagent_type": "general-purpose", "description": self.words(5), "prompt": self.words(self.rng.randint(50, 600))}
+        return {"type": "tool_use", "id": tool_id, "name": name, "input": inp}
+
+    def tool_result(self, call):
+        name, inp = call["name"], call["input"]
+        is_error = self.rng.random() < 0.03
+        if is_error:
+            content = f"Error: {self.words(self.rng.randint(5, 40))}"
+        elif name == "Read":
+            content = self.file_bodies[inp["file_path"]]
+        elif name in ("Grep", "Glob"):
+            content = "\n".join(self.rng.sample(self.files, self.rng.randint(1, 25)))
+        elif name == "Bash":
+            content = self.code_block(self.rng.randint(1, 200))
+        else:
+            content = self.words(self.rng.randint(5, 80))
+        item = {"type": "tool_result", "tool_use_id": call["id"], "content": content}
+        if is_error:
+            item["is_error"] = True
+        return item
+
+    def events(self):
+        """Yield events forever: a user turn, then an agentic tool loop."""
+        yield self.envelope("system", content="Session started", level="info")
+        while True:
+            if self.rng.random() < 0.2:
+                command = self.rng.choice(COMMANDS)
+                text = (
+                    f"<command-message>{command} is running…</command-message>\n"
+                    f"<command-name>/{command}</command-name>\n"
+                    f"<command-args>{self.words(6)}</command-args>"
+                )
+            else:
+                text = self.words(self.rng.randint(5, 120))
+            yield self.envelope("user", {"role": "user", "content": text})
+
+            for _ in range(self.rng.randint(3, 40)):
+                r = self.rng.random()
+                if r < 0.12:
+                    yield self.envelope("progress", data={"type": "hook_progress", "message": self.words(8)})
+                    continue
+                if r < 0.16:
+                    yield self.envelope("file-history-snapshot", snapshot={
+                        "trackedFileBackups": {p: {"version": 1} for p in self.rng.sample(self.files, 5)},
+                    })
+                    continue
+                if r < 0.30:
+                    yield self.assistant([{"type": "text", "text": self.words(self.rng.randint(10, 900))}])
+                    continue
+
+                # Exploratory runs dominate real sessions
+                if r < 0.70:
+                    name = self.rng.choice(EXPLORE_TOOLS)
+                else:
+                    name = self.rng.choice(("Bash", "Bash", "Edit", "Write", "Task"))
+                call = self.tool_use(name)
+                yield self.assistant([call])
+                result = self.tool_result(call)
+                if self.rng.random() < 0.5:
+                    yield self.assistant([result])
+                else:
+                    # Claude Code also records results as user events
+                    yield self.envelope("user", {"role": "user", "content": [result]})
+
+
+def generate(size, out, seed=0):
+    """Write events to the binary stream out until at least size bytes."""
+    written = 0
+    for event in SessionGenerator(seed).events():
+        line = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+        out.write(line)
+        written += len(line)
+        if written >= size:
+            return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Claude Code session.")
+    parser.add_argument("size", help="target size, e.g. 10MB or 1GB")
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.output == "-":
+        generate(parse_size(args.size), sys.stdout.buffer, args.seed)
+        return
+    with open(args.output, "wb") as f:
+        written = generate(parse_size(args.size), f, args.seed)
+    print(f"{args.output}: {written / 1_000_000:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
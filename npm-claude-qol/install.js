@@ -196,7 +196,9 @@ function install() {
     'scripts/auto_approve_safe.py',
     'scripts/auto_approve_safe.rules.json',
     'scripts/auto_approve_safe_rules_check.py',
+    'scripts/auto_approve_safe_log_compact.py',
     'scripts/context-monitor.py',
+    'scripts/qol_profile.py',
     'scripts/__pycache__/',
     'commands/optimize-auto-approve-hook.md',
     'commands/docs-quick-update.md',
@@ -204,6 +206,8 @@ function install() {
     'skills/nash/',
     'auto_approve_safe.decisions.jsonl',
     'auto_approve_safe.decisions.archived.jsonl',
+    'auto_approve_safe.decisions.rollup.json',
+    'profiles/',
     '*.backup',
   ];
   const addedCount = ensureGitignoreEntries(
@@ -21,6 +21,11 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    from qol_profile import profiled
+except ImportError:  # profiling helper not installed alongside
+    from contextlib import nullcontext as profiled
+
 # Max-autonomy default:
 # - Allow reads/searches
 # - Allow edits/writes except for sensitive paths
@@ -381,6 +386,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with profiled("auto_approve_safe"):
+        main()
 
 
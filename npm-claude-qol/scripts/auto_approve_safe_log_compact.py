@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Fold old auto_approve_safe decision-log records into a compact rollup.
+
+Most log lines repeat the same few decisions, so records older than
+--keep-days are aggregated by (tool, decision, reason, command head) with
+counts, first/last seen and a few sample inputs. Recent records stay raw
+in the decision log for detailed analysis.
+
+Usage:
+  python3 npm-claude-qol/scripts/auto_approve_safe_log_compact.py [--keep-days N]
+      [--log PATH] [--rollup PATH] [--max-samples N] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from auto_approve_safe import split_compound_shell_command, strip_safe_suffixes
+
+try:
+    from qol_profile import profiled
+except ImportError:  # profiling helper not installed alongside
+    from contextlib import nullcontext as profiled
+
+
+# Same location the hook logs to (scripts/ -> .claude/)
+DEFAULT_LOG = Path(__file__).parent.parent / "auto_approve_safe.decisions.jsonl"
+DEFAULT_ROLLUP = Path(__file__).parent.parent / "auto_approve_safe.decisions.rollup.json"
+
+ROLLUP_VERSION = 1
+
+# Commands whose first argument is a subcommand worth keeping in the head
+SUBCOMMAND_TOOLS = {
+    "git", "npm", "pnpm", "yarn", "npx", "bun", "gh", "docker", "cargo",
+    "go", "kubectl", "uv", "pip", "pip3", "poetry", "make", "brew",
+}
+
+_ENV_ASSIGN_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=\S*$")
+_NOT_ALLOWLISTED = "Command not in allowlist: "
+
+
+def segment_head(segment: str) -> str:
+    """Normalize one shell segment to its command (plus subcommand) head."""
+    words = strip_safe_suffixes(segment).split()
+    while words and _ENV_ASSIGN_RE.match(words[0]):
+        words = words[1:]
+    if not words:
+        return ""
+    head = os.path.basename(words[0])
+    if head in SUBCOMMAND_TOOLS and len(words) > 1 and not words[1].startswith("-"):
+        head = f"{head} {words[1]}"
+    return head
+
+
+def command_head(tool_name: str, tool_input: dict) -> str:
+    """Low-cardinality key for a logged input summary."""
+    if tool_name == "Bash":
+        segments = split_compound_shell_command(tool_input.get("command", ""))
+        return " | ".join(h for h in (segment_head(s) for s in segments) if h)
+    file_path = tool_input.get("file_path")
+    if file_path:
+        suffix = Path(file_path).suffix
+        return f"*{suffix}" if suffix else Path(file_path).name
+    return ""
+
+
+def normalize_reason(reason: str) -> str:
+    """Collapse per-command reasons (e.g. the unmatched segment) to their head."""
+    if reason.startswith(_NOT_ALLOWLISTED):
+        return _NOT_ALLOWLISTED + segment_head(reason[len(_NOT_ALLOWLISTED):])
+    return reason
+
+
+def sample_text(tool_input: dict) -> str:
+    return tool_input.get("command") or tool_input.get("file_path") or json.dumps(tool_input)
+
+
+def parse_ts(value: str) -> datetime | None:
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def load_rollup(path: Path) -> dict:
+    if path.exists():
+        try:
+            with path.open(encoding="utf-8") as f:
+                rollup = json.load(f)
+            if rollup.get("version") == ROLLUP_VERSION:
+                return rollup
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Could not load rollup, starting fresh: {e}", file=sys.stderr)
+    return {"version": ROLLUP_VERSION, "compacted_records": 0, "entries": []}
+
+
+def fold_record(index: dict, record: dict, max_samples: int) -> None:
+    """Add one raw decision record to the rollup index (keyed tuple -> entry)."""
+    tool = record.get("tool_name", "")
+    tool_input = record.get("input") or {}
+    key = (
+        tool,
+        record.get("decision", ""),
+        normalize_reason(record.get("reason", "")),
+        command_head(tool, tool_input),
+    )
+    ts = record.get("ts", "")
+    entry = index.get(key)
+    if entry is None:
+        entry = index[key] = {
+            "tool_name": key[0],
+            "decision": key[1],
+            "reason": key[2],
+            "head": key[3],
+            "count": 0,
+            "first_seen": ts,
+            "last_seen": ts,
+            "samples": [],
+        }
+    entry["count"] += 1
+    if ts and (not entry["first_seen"] or ts < entry["first_seen"]):
+        entry["first_seen"] = ts
+    if ts and ts > entry["last_seen"]:
+        entry["last_seen"] = ts
+    sample = sample_text(tool_input)
+    if len(entry["samples"]) < max_samples and sample not in entry["samples"]:
+        entry["samples"].append(sample)
+
+
+def compact(log_path: Path, rollup_path: Path, keep_days: float,
+            max_samples: int, dry_run: bool = False) -> dict:
+    """Fold log records older than keep_days into the rollup; rewrite the log
+    with only the recent (and unparseable) lines. Returns a summary dict."""
+    rollup = load_rollup(rollup_path)
+    index = {
+        (e["tool_name"], e["decision"], e["reason"], e["head"]): e
+        for e in rollup["entries"]
+    }
+    cutoff = datetime.now(timezone.utc) - timedelta(days=keep_days)
+
+    size_before = log_path.stat().st_size
+    tmp_path = log_path.with_name(log_path.name + f".{os.getpid()}.tmp")
+    folded = kept = 0
+    carry_from = size_before
+
+    with log_path.open("rb") as src:
+        with open(tmp_path, "wb") as dst:
+            # Only consume what exists now; the hook may append while we work
+            while True:
+                start = src.tell()
+                raw = src.readline()
+                if not raw:
+                    break
+                if src.tell() > size_before or not raw.endswith(b"\n"):
+                    # This line straddles the snapshot (or is still being
+                    # written); carry all of it over rather than parse it
+                    carry_from = start
+                    break
+                try:
+                    record = json.loads(raw)
+                    ts = parse_ts(record.get("ts", ""))
+                except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                    record, ts = None, None
+                if record is not None and ts is not None and ts < cutoff:
+                    fold_record(index, record, max_samples)
+                    folded += 1
+                else:
+                    dst.write(raw)
+                    kept += 1
+
+        entries = sorted(index.values(), key=lambda e: (-e["count"], e["tool_name"], e["head"]))
+        rollup["entries"] = entries
+        rollup["compacted_records"] = rollup.get("compacted_records", 0) + folded
+
+        if dry_run or folded == 0:
+            os.remove(tmp_path)
+        else:
+            tmp_rollup = rollup_path.with_name(rollup_path.name + f".{os.getpid()}.tmp")
+            with open(tmp_rollup, "w", encoding="utf-8") as f:
+                json.dump(rollup, f, indent=1, ensure_ascii=False)
+                f.write("\n")
+
+            # Carry over everything the hook appended since the snapshot as
+            # late as possible: only an append landing between this copy and
+            # the log rename right after it can still be lost.
+            with open(tmp_path, "ab") as dst:
+                src.seek(carry_from)
+                dst.write(src.read())
+            os.replace(tmp_path, log_path)
+            # Log first: dying between the renames loses these counts rather
+            # than leaving the records raw to be folded a second time.
+            os.replace(tmp_rollup, rollup_path)
+
+    return {
+        "folded": folded,
+        "kept": kept,
+        "keys": len(entries),
+        "log_bytes_before": size_before,
+        "log_bytes_after": size_before if dry_run or folded == 0 else log_path.stat().st_size,
+        "rollup_bytes": rollup_path.stat().st_size if rollup_path.exists() else 0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compact the auto-approve decision log.")
+    parser.add_argument("--log", type=Path, default=DEFAULT_LOG)
+    parser.add_argument("--rollup", type=Path, default=DEFAULT_ROLLUP)
+    parser.add_argument("--keep-days", type=float, default=7,
+                        help="keep records newer than this raw (default: 7)")
+    parser.add_argument("--max-samples", type=int, default=5,
+                        help="distinct sample inputs kept per rollup key (default: 5)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report what would be folded without writing")
+    args = parser.parse_args()
+
+    if not args.log.exists():
+        print(f"[missing] {args.log}")
+        return 1
+
+    summary = compact(args.log, args.rollup, args.keep_days, args.max_samples, args.dry_run)
+    prefix = "[dry run] would fold" if args.dry_run else "Folded"
+    print(
+        f"{prefix} {summary['folded']} records into {summary['keys']} rollup keys; "
+        f"{summary['kept']} recent records kept raw"
+    )
+    print(
+        f"  log: {summary['log_bytes_before'] / 1000:.1f}KB -> "
+        f"{summary['log_bytes_after'] / 1000:.1f}KB"
+    )
+    print(f"  rollup: {args.rollup} ({summary['rollup_bytes'] / 1000:.1f}KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    with profiled("auto_approve_safe_log_compact"):
+        raise SystemExit(main())
@@ -14,6 +14,11 @@ import sys
 from pathlib import Path
 from typing import Iterable
 
+try:
+    from qol_profile import profiled
+except ImportError:  # profiling helper not installed alongside
+    from contextlib import nullcontext as profiled
+
 
 DEFAULT_RULES = [
     Path(__file__).resolve().parent / "auto_approve_safe.rules.json",
@@ -163,4 +168,5 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    with profiled("auto_approve_safe_rules_check"):
+        raise SystemExit(main())
@@ -9,6 +9,11 @@ import json
 import sys
 import os
 
+try:
+    from qol_profile import profiled
+except ImportError:  # profiling helper not installed alongside
+    from contextlib import nullcontext as profiled
+
 
 def context_window_info(window):
     """
@@ -177,4 +182,5 @@ def main():
         print(f"\033[94m[Claude]\033[0m \033[93m📁 {os.path.basename(os.getcwd())}\033[0m 🧠 \033[31m[Error: {str(e)[:20]}]\033[0m")
 
 if __name__ == "__main__":
-    main()
+    with profiled("context-monitor"):
+        main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling shared by the claude-qol scripts, plus an aggregator.
+
+Hook-style scripts run thousands of times for a few milliseconds each, so a
+single run's profile says little. Each profiled run drops one file into a
+per-script directory; `report` merges them into one hotspot report.
+
+Enable for any script:
+  CLAUDE_QOL_PROFILE=1        cProfile each run      -> <script>/<ts>-<pid>.prof
+  CLAUDE_QOL_PROFILE=sample   sampled wall-clock stacks -> <script>/<ts>-<pid>.folded
+  or pass --profile on the command line (same as =1)
+
+Optional:
+  CLAUDE_QOL_PROFILE_DIR          output root (default: .claude/profiles)
+  CLAUDE_QOL_PROFILE_INTERVAL_MS  sampling interval (default: 1)
+
+Report:
+  python3 qol_profile.py report [script ...] [--top N] [--folded]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Hooks import this module on every run: keep module-level imports to what
+# the disabled path needs (argparse/threading/contextlib/cProfile load
+# on demand)
+
+ENV_VAR = "CLAUDE_QOL_PROFILE"
+DIR_ENV_VAR = "CLAUDE_QOL_PROFILE_DIR"
+INTERVAL_ENV_VAR = "CLAUDE_QOL_PROFILE_INTERVAL_MS"
+
+# Scripts live in .claude/scripts/, so profiles land in .claude/profiles/
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+
+
+def profile_mode() -> str | None:
+    """Return 'cprofile', 'sample' or None. Consumes a --profile argument."""
+    if "--profile" in sys.argv[1:]:
+        sys.argv.remove("--profile")
+        return "cprofile"
+    value = os.environ.get(ENV_VAR, "").strip().lower()
+    if not value or value in ("0", "false", "off"):
+        return None
+    return "sample" if value == "sample" else "cprofile"
+
+
+def profile_root() -> Path:
+    return Path(os.environ.get(DIR_ENV_VAR) or DEFAULT_PROFILE_DIR)
+
+
+def output_path(script: str, suffix: str) -> Path:
+    directory = profile_root() / script
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    return directory / f"{stamp}-{os.getpid()}{suffix}"
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def start_sampler(interval: float):
+    """Sample the calling thread's stack every interval seconds.
+
+    Returns (stacks, stop) where stacks is a Counter of root-first
+    ';'-joined stacks and stop() ends sampling.
+    """
+    import threading
+
+    target = threading.get_ident()
+    stacks: Counter = Counter()
+    done = threading.Event()
+
+    def run():
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                stacks[";".join(reversed(labels))] += 1
+
+    thread = threading.Thread(target=run, name="qol-profile-sampler", daemon=True)
+    thread.start()
+
+    def stop():
+        done.set()
+        thread.join()
+
+    return stacks, stop
+
+
+class _Disabled:
+    """No-op context manager returned by profiled() when profiling is off."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def profiled(script: str):
+    """Profile the enclosed block when profiling is enabled; no-op otherwise.
+
+    Never lets profiling break the script: failures to write are reported
+    on stderr and swallowed.
+    """
+    mode = profile_mode()
+    if mode is None:
+        return _Disabled()
+
+    from contextlib import contextmanager
+
+    return contextmanager(_profile_run)(script, mode)
+
+
+def _profile_run(script: str, mode: str):
+    """Generator body of profiled() for an enabled mode."""
+    if mode == "sample":
+        interval = float(os.environ.get(INTERVAL_ENV_VAR, "1")) / 1000
+        stacks, stop = start_sampler(interval)
+        try:
+            yield
+        finally:
+            stop()
+            try:
+                with open(output_path(script, ".folded"), "w", encoding="utf-8") as f:
+                    for stack, count in stacks.items():
+                        f.write(f"{stack} {count}\n")
+            except Exception as e:
+                print(f"Warning: Could not write profile: {e}", file=sys.stderr)
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            profiler.dump_stats(str(output_path(script, ".prof")))
+        except Exception as e:
+            print(f"Warning: Could not write profile: {e}", file=sys.stderr)
+
+
+def report_cprofile(files: list[Path], top: int) -> None:
+    import pstats
+
+    stats = pstats.Stats(str(files[0]), stream=sys.stdout)
+    for path in files[1:]:
+        stats.add(str(path))
+    print(f"cProfile: {len(files)} runs, {stats.total_tt:.3f}s total "
+          f"({stats.total_tt / len(files) * 1000:.2f}ms per run)")
+    stats.sort_stats("cumulative").print_stats(top)
+    stats.sort_stats("tottime").print_stats(top)
+
+
+def report_samples(files: list[Path], top: int, folded: bool) -> None:
+    merged: Counter = Counter()
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit():
+                    merged[stack] += int(count)
+
+    if folded:
+        for stack, count in merged.most_common():
+            print(f"{stack} {count}")
+        return
+
+    total = sum(merged.values()) or 1
+    self_counts: Counter = Counter()
+    inclusive: Counter = Counter()
+    for stack, count in merged.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+
+    print(f"Samples: {len(files)} runs, {total} samples")
+    for title, counter in (("self", self_counts), ("inclusive", inclusive)):
+        print(f"\nTop {top} by {title} time:")
+        for frame, count in counter.most_common(top):
+            print(f"  {count / total * 100:6.1f}%  {count:>8}  {frame}")
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge claude-qol profiles into a hotspot report.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="aggregate profiles per script")
+    rep.add_argument("scripts", nargs="*", help="script names (default: all)")
+    rep.add_argument("--top", type=int, default=20)
+    rep.add_argument("--folded", action="store_true",
+                     help="print merged folded stacks (flamegraph input) instead")
+    args = parser.parse_args()
+
+    root = profile_root()
+    scripts = args.scripts
+    if not scripts and root.exists():
+        scripts = sorted(p.name for p in root.iterdir() if p.is_dir())
+    if not scripts:
+        print(f"No profiles found under {root}")
+        return 1
+
+    for script in scripts:
+        directory = root / script
+        prof = sorted(directory.glob("*.prof"))
+        samples = sorted(directory.glob("*.folded"))
+        print(f"\n== {script} ==")
+        if not prof and not samples:
+            print("  (no profiles)")
+        if prof:
+            report_cprofile(prof, args.top)
+        if samples:
+            report_samples(samples, args.top, args.folded)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,23 +4,70 @@ Nash transcript pruner — reduces large Claude Code session JSONL files
 for analysis by the Opus subagent.
 
 Usage:
-    python3 prune_transcript.py <output_dir> <session_file> [session_file ...]
+    python3 prune_transcript.py [--jobs N] [--target-tokens N | --target-bytes N |
+                                 --total-tokens N | --total-bytes N [--workflow NAME]]
+                                [--cache-dir DIR | --no-cache] [--incremental] [--dedup]
+                                [--format jsonl|compact|compact-time]
+                                <output_dir> <session_file> [session_file ...]
 
-Size tiers:
+    --jobs N          prune up to N files concurrently (default 1). Files are
+                      scheduled largest first; the report stays in argument order.
+    --target-tokens N budget mode: prune each file only as much as needed to
+    --target-bytes N  fit the budget (tokens are estimated at 4 bytes each).
+    --total-tokens N  multi-session budget mode: one budget for all files,
+    --total-bytes N   split by relevance (see --workflow) after a statistics
+                      pass over every file (cached, see --cache-dir); each
+                      file is pruned to its share.
+    --workflow NAME   with a total budget, weight sessions by how often they
+                      mention NAME.
+    --cache-dir DIR   reuse pruned outputs keyed on source path, size, mtime,
+                      pruning options and pruner version (default: tmp/cache).
+                      Entries unused for 14 days, or beyond 200MB total, are evicted.
+    --no-cache        always re-prune.
+    --incremental     for append-only live sessions: resume from a checkpoint
+                      (<output>.ckpt) and append only newly written events.
+                      Truncated/rewritten sources trigger a full rebuild.
+    --dedup           replace tool inputs/results already emitted earlier in
+                      the session (repeat Reads, Greps, ...) with a short
+                      back-reference to the event holding the first copy.
+                      Also applies to files that would otherwise pass
+                      through (under 2MB or within budget); their metadata
+                      is dropped as well. In aggressive mode collapsed
+                      exploratory results are dropped before dedup sees
+                      them, so their repeats are not referenced.
+    --format FMT      jsonl (default) keeps original event JSON; compact emits
+                      one short line per event (role, tool name, key input
+                      fields, truncated results) without ids or metadata;
+                      compact-time also prefixes seconds since the previous event.
+
+Size tiers (default, no budget):
     < 2MB   — pass through unchanged
     2-10MB  — prune: keep user messages, truncate tool I/O, drop metadata
     > 10MB  — aggressive: also collapse consecutive exploratory tool calls
+
+Budget mode makes a statistics pass first (string-length histograms per item
+type), picks the loosest truncation limits whose estimated output fits, and
+only enables exploratory-run collapsing if truncation alone is not enough.
 """
 
+import argparse
+import copy
+import hashlib
 import json
-import sys
+import math
 import os
-import copy
+import shutil
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 
 
 # JSONL structure reference:
 #   Top-level: { type, message: { role, content }, uuid, timestamp, ... }
-#   type='user':       message.content is a string (the user's text)
+#   type='user':       message.content is a string (the user's text), or a
+#                      list of tool_result items (results recorded as user events)
 #   type='assistant':  message.content is a list of items:
 #     - { type: 'text', text: '...' }
 #     - { type: 'tool_use', name: '...', input: {...} }
@@ -28,158 +75,1160 @@ import copy
 #   type='progress'|'system'|'file-history-snapshot': metadata events (skip)
 
 
-def prune_transcript(filepath):
-    size = os.path.getsize(filepath)
+# Truncation limits per item type: (threshold, keep). Strings longer than
+# `threshold` chars are cut to their first `keep` chars plus a marker.
+DEFAULT_LIMITS = {
+    "tool_input": (500, 200),
+    "tool_result": (1000, 200),
+    "text": (2000, 500),
+}
 
-    # Under 2MB: pass through unchanged
-    if size < 2_000_000:
-        with open(filepath, "r") as f:
-            return f.read()
+TRUNCATION_MARKER = " [truncated]"
 
-    aggressive = size > 10_000_000
-    lines = []
-    pruned_count = 0
-    prev_was_explore = False
+# Rough conversion used by --target-tokens (JSON-heavy text averages ~4 bytes/token)
+BYTES_PER_TOKEN = 4
 
-    with open(filepath, "r") as f:
-        for raw_line in f:
-            raw_line = raw_line.strip()
-            if not raw_line:
-                continue
-            try:
-                event = json.loads(raw_line)
-            except json.JSONDecodeError:
-                lines.append(raw_line)
-                continue
+# Aim slightly under the budget: estimates ignore JSON re-encoding differences
+BUDGET_SAFETY = 0.95
 
-            event_type = event.get("type", "")
-            msg = event.get("message", {})
-            content = msg.get("content", "")
+# Never keep less than this many chars of a truncated string
+MIN_KEEP = 40
 
-            # Skip metadata events
-            if event_type not in ("user", "assistant"):
-                continue
+EXPLORE_TOOLS = ("Glob", "Grep", "Read")
 
-            # Always keep user messages in full
-            if event_type == "user":
-                prev_was_explore = False
-                lines.append(raw_line)
-                continue
+# Dedup: payloads of these types, at least DEDUP_MIN_CHARS long, are hashed
+# into an LRU of DEDUP_LRU_SIZE entries; repeats become a back-reference
+DEDUP_KEYS = ("tool_input", "tool_result")
+DEDUP_MIN_CHARS = 100
+DEDUP_LRU_SIZE = 4096
 
-            # For assistant messages, content is a list of items
-            if not isinstance(content, list):
-                lines.append(raw_line)
-                continue
+# Output formats: original JSONL lines, or one short line per event
+FORMATS = ("jsonl", "compact", "compact-time")
+COMPACT_LEGEND = (
+    "# compact transcript: '#N' = event number, U=user A=assistant, 'X: text', "
+    "'X> Tool key=value' (tool call), 'X< result', 'X<! error'; "
+    "'+Ns' = seconds since previous event"
+)
+# Key input fields shown per tool in compact output (others: all scalar fields)
+COMPACT_INPUT_FIELDS = {
+    "Bash": ("command",),
+    "Read": ("file_path", "offset", "limit"),
+    "Write": ("file_path",),
+    "Edit": ("file_path",),
+    "MultiEdit": ("file_path",),
+    "Grep": ("pattern", "path", "glob"),
+    "Glob": ("pattern", "path"),
+    "Task": ("subagent_type", "description"),
+    "Skill": ("skill",),
+}
+
+# Bump whenever pruning output changes, so cached results are not reused
+PRUNER_VERSION = 7
+
+# Pruned-output cache (see cache_key); defaults to tmp/cache next to this script
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmp", "cache")
+CACHE_SUFFIX = ".cache"
+CACHE_MAX_BYTES = 200_000_000
+CACHE_MAX_AGE_DAYS = 14
+
+# Incremental mode keeps resume state in <output>.ckpt
+CHECKPOINT_SUFFIX = ".ckpt"
+
+
+def walk_events(f):
+    """Yield (raw_line, event, kind, is_explore) for every line worth keeping.
+
+    kind is one of:
+      'user'  — user message, kept in full, resets the explore run
+      'error' — event containing an error item, kept in full, resets
+      'raw'   — unparseable line or non-list assistant content, kept as-is
+      'items' — assistant event, or user event carrying tool_results, whose
+                content items may be truncated/collapsed
+    Metadata events are skipped entirely.
+    """
+    for raw_line in f:
+        raw_line = raw_line.strip()
+        if not raw_line:
+            continue
+        try:
+            event = json.loads(raw_line)
+        except json.JSONDecodeError:
+            yield raw_line, None, "raw", False
+            continue
 
-            # Keep full event if any item is an error
-            has_error = any(
-                isinstance(item, dict) and item.get("is_error", False)
+        event_type = event.get("type", "")
+        msg = event.get("message", {})
+        content = msg.get("content", "")
+
+        # Skip metadata events
+        if event_type not in ("user", "assistant"):
+            continue
+
+        # Always keep user messages in full; user events carrying
+        # tool_results are tool output and are pruned like assistant events
+        if event_type == "user" and not (
+            isinstance(content, list)
+            and any(
+                isinstance(item, dict) and item.get("type") == "tool_result"
                 for item in content
             )
-            if has_error:
-                prev_was_explore = False
-                lines.append(raw_line)
-                continue
+        ):
+            yield raw_line, event, "user", False
+            continue
+
+        # For assistant messages, content is a list of items
+        if not isinstance(content, list):
+            yield raw_line, event, "raw", False
+            continue
+
+        # Keep full event if any item is an error
+        has_error = any(
+            isinstance(item, dict) and item.get("is_error", False)
+            for item in content
+        )
+        if has_error:
+            yield raw_line, event, "error", False
+            continue
 
-            # Aggressive mode (>10MB): collapse consecutive exploratory tool calls
-            if aggressive:
-                tool_names = [
-                    item.get("name", "")
+        tool_names = [
+            item.get("name", "")
+            for item in content
+            if isinstance(item, dict) and item.get("type") == "tool_use"
+        ]
+        is_explore = (
+            all(n in EXPLORE_TOOLS for n in tool_names)
+            and len(tool_names) > 0
+        )
+        # Also treat events with only tool_results as exploratory
+        if not tool_names:
+            is_explore = (
+                all(
+                    isinstance(item, dict)
+                    and item.get("type") == "tool_result"
                     for item in content
-                    if isinstance(item, dict) and item.get("type") == "tool_use"
-                ]
-                is_explore = (
-                    all(n in ("Glob", "Grep", "Read") for n in tool_names)
-                    and len(tool_names) > 0
+                    if isinstance(item, dict)
                 )
-                # Also treat events with only tool_results as exploratory
-                if not tool_names:
-                    is_explore = (
-                        all(
-                            isinstance(item, dict)
-                            and item.get("type") == "tool_result"
-                            for item in content
-                            if isinstance(item, dict)
-                        )
-                        and len(content) > 0
-                    )
-                if is_explore and prev_was_explore:
-                    pruned_count += 1
-                    continue
-                prev_was_explore = is_explore
+                and len(content) > 0
+            )
+        yield raw_line, event, "items", is_explore
+
+
+def iter_truncatable(content, compact=False):
+    """Yield (limit_key, container, field) for each string a limit applies to.
+
+    With compact, tool inputs are limited to the fields compact output shows.
+    """
+    for item in content:
+        if not isinstance(item, dict):
+            continue
+        item_type = item.get("type", "")
+
+        # tool_use inputs (long string values in input dict)
+        if item_type == "tool_use":
+            inp = item.get("input", {})
+            if isinstance(inp, dict):
+                shown = COMPACT_INPUT_FIELDS.get(item.get("name")) if compact else None
+                for k, v in inp.items():
+                    if isinstance(v, str) and (shown is None or k in shown):
+                        yield "tool_input", inp, k
+
+        # tool_result content: a string, or a list of text blocks
+        elif item_type == "tool_result":
+            result = item.get("content")
+            if isinstance(result, str):
+                yield "tool_result", item, "content"
+            elif isinstance(result, list):
+                for block in result:
+                    if isinstance(block, dict) and isinstance(block.get("text"), str):
+                        yield "tool_result", block, "text"
+
+        # text blocks
+        elif item_type == "text":
+            if isinstance(item.get("text"), str):
+                yield "text", item, "text"
+
+
+def payload_digest(key, val):
+    """Short content hash of a tool payload string, used for dedup."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(key.encode())
+    h.update(b"\0")
+    h.update(val.encode("utf-8", errors="replace"))
+    return h.hexdigest()
+
+
+def dedup_ref(key, event, event_id=None):
+    """Back-reference text pointing at the event that holds the first copy.
+
+    The event is named by its uuid, or by event_id (compact output, which
+    drops uuids, numbers its events instead).
+    """
+    label = "tool input" if key == "tool_input" else "tool result"
+    ident = event_id or event.get("uuid")
+    where = f"event {ident}" if ident else "an earlier event"
+    return f"[duplicate {label}, same as {where}]"
+
+
+def dedup_lookup(seen, key, val, ref):
+    """Check one payload against the LRU. Returns the first occurrence's
+    back-reference if val is a repeat; otherwise records val under ref and
+    returns None. seen is an OrderedDict bounded to DEDUP_LRU_SIZE."""
+    digest = payload_digest(key, val)
+    if digest in seen:
+        seen.move_to_end(digest)
+        return seen[digest]
+    seen[digest] = ref
+    if len(seen) > DEDUP_LRU_SIZE:
+        seen.popitem(last=False)
+    return None
+
+
+def prune_event(event, limits, seen=None, event_id=None):
+    """Return a pruned deep copy of an event, or None if unchanged.
+
+    With seen (a dedup LRU), tool inputs/results already emitted earlier are
+    replaced by a back-reference before truncation applies; event_id names
+    this event in those references instead of its uuid. limits=None
+    disables truncation.
+    """
+    event_copy = copy.deepcopy(event)
+    modified = False
+    for key, container, field in iter_truncatable(event_copy["message"]["content"]):
+        val = container[field]
+        if seen is not None and key in DEDUP_KEYS and len(val) >= DEDUP_MIN_CHARS:
+            ref = dedup_lookup(seen, key, val, dedup_ref(key, event, event_id))
+            if ref is not None:
+                container[field] = ref
+                modified = True
+                continue
+        if limits is None:
+            continue
+        threshold, keep = limits[key]
+        if len(val) > threshold:
+            container[field] = val[:keep] + TRUNCATION_MARKER
+            modified = True
+    return event_copy if modified else None
+
+
+def scale_limits(factor):
+    """Scale DEFAULT_LIMITS by factor, keeping at least MIN_KEEP chars."""
+    scaled = {}
+    for key, (threshold, keep) in DEFAULT_LIMITS.items():
+        new_keep = max(MIN_KEEP, int(keep * factor))
+        new_threshold = max(new_keep + len(TRUNCATION_MARKER), int(threshold * factor))
+        scaled[key] = (new_threshold, new_keep)
+    return scaled
+
+
+def collect_stats(filepath, dedup=False, workflow=None, fmt="jsonl"):
+    """Statistics pass: size histograms per truncatable item type.
+
+    With dedup, repeated payloads are counted at their back-reference size
+    (as seen by aggressive mode, which slightly overestimates plain mode).
+    With workflow, kept lines mentioning that name are counted as well.
+    Sizes describe output in fmt: for compact formats each event is measured
+    as its rendered line, and only strings that line shows are histogrammed;
+    render_ratio (rendered/raw chars of those strings, e.g. escaped
+    newlines) scales them in estimate_size().
+
+    Returns a dict with:
+      size          — source file size in bytes
+      format        — fmt the sizes below describe
+      render_ratio  — output chars per raw char of histogrammed strings
+      mentions      — kept lines mentioning workflow (0 without one)
+      fixed_bytes   — output bytes independent of truncation limits
+      explore_bytes — fixed bytes of events aggressive mode would collapse
+      hist / explore_hist — {limit_key: {encoded_len: count}}
+      collapsed     — number of events aggressive mode would collapse
+      max_len       — longest truncatable string seen
+    """
+    stats = {
+        "size": os.path.getsize(filepath),
+        "format": fmt,
+        "mentions": 0,
+        "fixed_bytes": 0,
+        "explore_bytes": 0,
+        "hist": {key: {} for key in DEFAULT_LIMITS},
+        "explore_hist": {key: {} for key in DEFAULT_LIMITS},
+        "collapsed": 0,
+        "max_len": 0,
+        "render_ratio": 1.0,
+    }
+    raw_chars = rendered_chars = 0
+    prev_was_explore = False
+    seen = OrderedDict() if dedup else None
+    workflow = workflow.lstrip("/") if workflow else None
+    compact = fmt != "jsonl"
+    render_state = {"last_ts": None, "event_no": 0}
+    if compact:
+        stats["fixed_bytes"] += len(COMPACT_LEGEND) + 1
+
+    with open(filepath, "r") as f:
+        for raw_line, event, kind, is_explore in walk_events(f):
+            if compact and event is not None:
+                event_id = compact_id(render_state)
+                line = render_compact(event, render_state, event_id, fmt == "compact-time")
+                line_bytes = len(line.encode()) + 1
+            else:
+                event_id = None
+                line_bytes = len(raw_line.encode()) + 1
+            if workflow and workflow in raw_line:
+                stats["mentions"] += 1
+            if kind != "items":
+                if kind in ("user", "error"):
+                    prev_was_explore = False
+                stats["fixed_bytes"] += line_bytes
+                continue
+
+            collapsible = is_explore and prev_was_explore
+            prev_was_explore = is_explore
+            if collapsible:
+                stats["collapsed"] += 1
+            hist = stats["explore_hist"] if collapsible else stats["hist"]
+
+            # Approximate string length by character count; line_bytes counts
+            # the encoded line with any escaping, so the remainder is the
+            # overhead (non-ASCII text errs on the high side).
+            for key, container, field in iter_truncatable(
+                event["message"]["content"], compact
+            ):
+                val = container[field]
+                n = len(val)
+                if compact:
+                    rendered = len(compact_text(val))
+                    raw_chars += n
+                    rendered_chars += rendered
+                    line_bytes -= rendered
+                else:
+                    line_bytes -= n
+                if seen is not None and key in DEDUP_KEYS and n >= DEDUP_MIN_CHARS:
+                    if collapsible:
+                        # Collapsed events never reach the output, so only peek
+                        ref = seen.get(payload_digest(key, val))
+                    else:
+                        ref = dedup_lookup(seen, key, val, dedup_ref(key, event, event_id))
+                    if ref is not None:
+                        line_bytes += len(ref)
+                        continue
+                hist[key][n] = hist[key].get(n, 0) + 1
+                stats["max_len"] = max(stats["max_len"], n)
+
+            if collapsible:
+                stats["explore_bytes"] += line_bytes
+            else:
+                stats["fixed_bytes"] += line_bytes
+
+    if raw_chars:
+        stats["render_ratio"] = rendered_chars / raw_chars
+    return stats
+
+
+def estimate_size(stats, limits, aggressive):
+    """Estimate output bytes for the given limits from collected stats."""
+    total = stats["fixed_bytes"]
+    ratio = stats.get("render_ratio", 1.0)
+    hists = [stats["hist"]]
+    if not aggressive:
+        total += stats["explore_bytes"]
+        hists.append(stats["explore_hist"])
+    for hist in hists:
+        for key, counts in hist.items():
+            threshold, keep = limits[key]
+            for n, count in counts.items():
+                if n > threshold:
+                    total += (keep * ratio + len(TRUNCATION_MARKER)) * count
+                else:
+                    total += n * ratio * count
+    return int(total)
+
+
+def untruncated_size(stats):
+    """Estimated output bytes with metadata dropped and nothing truncated.
+
+    Compact output never truncates more loosely than DEFAULT_LIMITS (see
+    compact_limits), so for compact stats that is its largest size.
+    """
+    if stats.get("format", "jsonl") != "jsonl":
+        return estimate_size(stats, DEFAULT_LIMITS, False)
+    smallest = min(threshold for threshold, _ in DEFAULT_LIMITS.values())
+    loosest = scale_limits(max(1.0, stats["max_len"] / smallest + 1))
+    return estimate_size(stats, loosest, False)
+
+
+def plan_for_budget(stats, budget):
+    """Pick the loosest (limits, aggressive) whose estimate fits the budget.
+
+    Tries plain truncation first and only enables exploratory-run collapsing
+    when the tightest limits still overflow. Returns (limits, aggressive,
+    estimated_bytes).
+    """
+    target = budget * BUDGET_SAFETY
+    smallest = min(threshold for threshold, _ in DEFAULT_LIMITS.values())
+    hi_factor = max(1.0, stats["max_len"] / smallest + 1)
+
+    for aggressive in (False, True):
+        lo_limits = scale_limits(0)
+        if estimate_size(stats, lo_limits, aggressive) > target:
+            continue
+        hi_limits = scale_limits(hi_factor)
+        if estimate_size(stats, hi_limits, aggressive) <= target:
+            return hi_limits, aggressive, estimate_size(stats, hi_limits, aggressive)
+
+        # Estimated size grows monotonically with the factor: bisect for the
+        # largest factor that still fits.
+        lo, hi = 0.0, hi_factor
+        for _ in range(40):
+            mid = (lo + hi) / 2
+            if estimate_size(stats, scale_limits(mid), aggressive) <= target:
+                lo = mid
             else:
-                prev_was_explore = False
-
-            # Truncate large content items
-            event_copy = copy.deepcopy(event)
-            msg_copy = event_copy["message"]
-            modified = False
-
-            for item in msg_copy["content"]:
-                if not isinstance(item, dict):
-                    continue
-                item_type = item.get("type", "")
-
-                # Truncate tool_use inputs (long string values in input dict)
-                if item_type == "tool_use":
-                    inp = item.get("input", {})
-                    if isinstance(inp, dict):
-                        for k, v in inp.items():
-                            if isinstance(v, str) and len(v) > 500:
-                                inp[k] = v[:200] + " [truncated]"
-                                modified = True
-
-                # Truncate tool_result content
-                elif item_type == "tool_result":
-                    val = item.get("content", "")
-                    if isinstance(val, str) and len(val) > 1000:
-                        item["content"] = val[:200] + " [truncated]"
-                        modified = True
-
-                # Truncate long text blocks
-                elif item_type == "text":
-                    val = item.get("text", "")
-                    if isinstance(val, str) and len(val) > 2000:
-                        item["text"] = val[:500] + " [truncated]"
-                        modified = True
-
-            if modified:
-                lines.append(json.dumps(event_copy))
+                hi = mid
+        limits = scale_limits(lo)
+        return limits, aggressive, estimate_size(stats, limits, aggressive)
+
+    # Nothing fits; return the tightest plan available
+    limits = scale_limits(0)
+    return limits, True, estimate_size(stats, limits, True)
+
+
+def tier_for_size(size):
+    """Fixed size tiers: (limits, aggressive), or None to pass through unchanged."""
+    # Under 2MB: pass through unchanged
+    if size < 2_000_000:
+        return None
+    return DEFAULT_LIMITS, size > 10_000_000
+
+
+def compact_limits(limits):
+    """Limits for compact output: never looser than DEFAULT_LIMITS, since
+    each event must stay one short line (limits=None counts as loosest)."""
+    if limits is None:
+        return DEFAULT_LIMITS
+    return {key: min(limits[key], DEFAULT_LIMITS[key]) for key in DEFAULT_LIMITS}
+
+
+def compact_text(val):
+    """Flatten a string or list of text items to one line."""
+    if isinstance(val, list):
+        val = " ".join(
+            item.get("text", "") if isinstance(item, dict) else str(item)
+            for item in val
+        )
+    elif not isinstance(val, str):
+        val = json.dumps(val, ensure_ascii=False)
+    return val.replace("\r", "").replace("\n", "\\n")
+
+
+def compact_item(role, item):
+    """Render one content item of an event in the compact format."""
+    if not isinstance(item, dict):
+        return f"{role}: {compact_text(item)}"
+    item_type = item.get("type", "")
+
+    if item_type == "text":
+        return f"{role}: {compact_text(item.get('text', ''))}"
+
+    if item_type == "tool_use":
+        name = item.get("name", "?")
+        inp = item.get("input", {})
+        if not isinstance(inp, dict):
+            return f"{role}> {name} {compact_text(inp)}"
+        fields = COMPACT_INPUT_FIELDS.get(name)
+        if fields is None:
+            fields = [k for k, v in inp.items() if isinstance(v, (str, int, float, bool))]
+        args = " ".join(
+            f"{k}={compact_text(inp[k])}" for k in fields if k in inp
+        )
+        return f"{role}> {name} {args}".rstrip()
+
+    if item_type == "tool_result":
+        marker = "<!" if item.get("is_error") else "<"
+        return f"{role}{marker} {compact_text(item.get('content', ''))}"
+
+    return f"{role}: [{item_type or 'item'}]"
+
+
+def parse_timestamp(stamp):
+    """Parse an ISO timestamp as an aware datetime (naive means UTC), or None."""
+    try:
+        ts = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def time_prefix(event, state):
+    """'@<timestamp> ' for the first event, '+<seconds>s ' after that."""
+    stamp = event.get("timestamp")
+    current = parse_timestamp(stamp)
+    if current is None:
+        return ""
+    last = state.get("last_ts")
+    state["last_ts"] = stamp
+    if last is None:
+        return f"@{stamp} "
+    previous = parse_timestamp(last)
+    return f"+{max(0, round((current - previous).total_seconds()))}s "
+
+
+def compact_id(state):
+    """Number the next compact event; returns its '#N' id."""
+    state["event_no"] += 1
+    return f"#{state['event_no']}"
+
+
+def render_compact(event, state, event_id, with_time=False):
+    """One short line per event: id, role, tool names, key input fields, results."""
+    role = "U" if event.get("type") == "user" else "A"
+    content = event.get("message", {}).get("content", "")
+    if isinstance(content, list):
+        body = " | ".join(compact_item(role, item) for item in content)
+    else:
+        body = f"{role}: {compact_text(content)}"
+    prefix = time_prefix(event, state) if with_time else ""
+    return f"{event_id} {prefix}{body}"
+
+
+def prune_lines(lines, limits, aggressive, state, fmt="jsonl"):
+    """Yield pruned output lines for an iterable of raw JSONL lines.
+
+    state holds 'prev_was_explore', 'pruned_count', 'seen' (the dedup LRU,
+    or None when dedup is off), 'last_ts' (for compact time offsets) and
+    'event_no' (the last compact event number) and is updated in place, so
+    a later call can resume where this one stopped. fmt is one of FORMATS;
+    compact formats render each kept event with render_compact() instead of
+    re-emitting its JSON. limits=None keeps content untruncated.
+    """
+    compact = fmt != "jsonl"
+    with_time = fmt == "compact-time"
+
+    for raw_line, event, kind, is_explore in walk_events(lines):
+        if kind != "items":
+            if kind in ("user", "error"):
+                state["prev_was_explore"] = False
+            if compact and event is not None:
+                yield render_compact(event, state, compact_id(state), with_time)
             else:
-                lines.append(raw_line)
+                yield raw_line
+            continue
+
+        # Aggressive mode: collapse consecutive exploratory tool calls
+        if aggressive:
+            if is_explore and state["prev_was_explore"]:
+                state["pruned_count"] += 1
+                continue
+            state["prev_was_explore"] = is_explore
+        else:
+            state["prev_was_explore"] = False
+
+        # Dedup repeated payloads, truncate large content items
+        event_id = compact_id(state) if compact else None
+        event_copy = prune_event(event, limits, state["seen"], event_id)
+        if compact:
+            yield render_compact(event_copy or event, state, event_id, with_time)
+        elif event_copy is not None:
+            yield json.dumps(event_copy, ensure_ascii=False, separators=(",", ":"))
+        else:
+            yield raw_line
+
+
+def prune_transcript(filepath, target_bytes=None, dedup=False, stats=None,
+                     fmt="jsonl"):
+    """Prune one session file and return the pruned text.
+
+    Without target_bytes the fixed size tiers apply. With target_bytes a
+    statistics pass picks truncation limits that land just under the budget,
+    then a second pass prunes with them (or drops only metadata when that
+    alone fits); pass stats to reuse an earlier
+    collect_stats() result instead. dedup replaces repeated tool
+    inputs/results with a back-reference to their first occurrence; it also
+    applies to files that would otherwise pass through, which are then
+    pruned with limits=None.
+
+    Compact formats (see FORMATS) are always rendered, even for files small
+    enough to pass through, and never truncate more loosely than
+    DEFAULT_LIMITS. Their budget plan uses compact-format stats, so output
+    is only cut below the default compact limits when those do not fit.
+    """
+    size = os.path.getsize(filepath)
+    compact = fmt != "jsonl"
+    passthrough = not compact and not dedup
+
+    if target_bytes is None:
+        tier = tier_for_size(size)
+        if tier is None:
+            if passthrough:
+                with open(filepath, "r") as f:
+                    return f.read()
+            tier = (None, False)
+        limits, aggressive = tier
+    elif size <= target_bytes:
+        if passthrough:
+            with open(filepath, "r") as f:
+                return f.read()
+        limits, aggressive = None, False
+    else:
+        if stats is None:
+            stats = collect_stats(filepath, dedup=dedup, fmt=fmt)
+        if untruncated_size(stats) <= target_bytes:
+            # Dropping metadata alone fits: keep every payload whole
+            limits, aggressive = None, False
+        else:
+            limits, aggressive, _ = plan_for_budget(stats, target_bytes)
+
+    if compact:
+        limits = compact_limits(limits)
+
+    state = {
+        "prev_was_explore": False,
+        "pruned_count": 0,
+        "seen": OrderedDict() if dedup else None,
+        "last_ts": None,
+        "event_no": 0,
+    }
+    with open(filepath, "r") as f:
+        lines = list(prune_lines(f, limits, aggressive, state, fmt))
 
     result = "\n".join(lines)
-    if pruned_count > 0:
+    if state["pruned_count"] > 0:
         result = (
-            f"[... {pruned_count} consecutive exploratory results pruned ...]\n"
+            f"[... {state['pruned_count']} consecutive exploratory results pruned ...]\n"
             + result
         )
+    if compact:
+        result = COMPACT_LEGEND + "\n" + result
     return result
 
 
+def read_complete_lines(f, cursor):
+    """Yield decoded newline-terminated lines from binary file f.
+
+    Stops at a trailing partial line (a live session may be mid-write).
+    cursor['offset'], cursor['last_start'] and cursor['last_hash'] track the
+    end of the last complete line consumed.
+    """
+    while True:
+        start = f.tell()
+        raw = f.readline()
+        if not raw.endswith(b"\n"):
+            return
+        cursor["offset"] = start + len(raw)
+        cursor["last_start"] = start
+        cursor["last_hash"] = hashlib.sha256(raw).hexdigest()
+        yield raw.decode("utf-8", errors="replace")
+
+
+def load_checkpoint(ckpt_path, filepath, outpath, mode, dedup=False, fmt="jsonl"):
+    """Return the checkpoint if resuming from it is safe, else None.
+
+    Resuming requires the same source, pruner version, tier, dedup setting
+    and format, an output file of the recorded size, and a source whose last
+    checkpointed line is still byte-identical (otherwise it was truncated or
+    rewritten).
+    """
+    try:
+        with open(ckpt_path, "r") as f:
+            ckpt = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if (
+        ckpt.get("version") != PRUNER_VERSION
+        or ckpt.get("source") != os.path.abspath(filepath)
+        or ckpt.get("mode") != mode
+        or ckpt.get("dedup", False) != dedup
+        or ckpt.get("format", "jsonl") != fmt
+    ):
+        return None
+    try:
+        if os.path.getsize(outpath) != ckpt["out_size"]:
+            return None
+        if os.path.getsize(filepath) < ckpt["offset"]:
+            return None
+        if ckpt["offset"] > 0:
+            with open(filepath, "rb") as f:
+                f.seek(ckpt["last_start"])
+                raw = f.read(ckpt["offset"] - ckpt["last_start"])
+            if hashlib.sha256(raw).hexdigest() != ckpt["last_hash"]:
+                return None
+    except (OSError, KeyError):
+        return None
+    return ckpt
+
+
+def prune_incremental(filepath, outpath, dedup=False, fmt="jsonl"):
+    """Prune only what was appended to filepath since the last run.
+
+    A checkpoint (<outpath>.ckpt) stores the byte offset, last line hash and
+    explore-collapse state (plus the dedup LRU, last timestamp and compact
+    event number when used). New pruned lines are appended to outpath, each newline-terminated;
+    collapsed runs are noted by a marker line after the chunk they occurred
+    in rather than a header. Falls back to a full rebuild when the
+    checkpoint cannot be trusted or the size tier changed.
+    Returns 'incremental' or 'rebuilt'.
+    """
+    ckpt_path = outpath + CHECKPOINT_SUFFIX
+    tier = tier_for_size(os.path.getsize(filepath))
+    if tier is None:
+        mode = "passthrough"
+    else:
+        mode = "aggressive" if tier[1] else "prune"
+
+    ckpt = load_checkpoint(ckpt_path, filepath, outpath, mode, dedup, fmt)
+    if ckpt is None:
+        status = "rebuilt"
+        ckpt = {"offset": 0, "last_start": 0, "last_hash": None, "seen": []}
+        prev_was_explore = False
+        out_mode = "w"
+    else:
+        status = "incremental"
+        prev_was_explore = ckpt["prev_was_explore"]
+        out_mode = "a"
+    state = {
+        "prev_was_explore": prev_was_explore,
+        "pruned_count": 0,
+        "seen": OrderedDict(ckpt.get("seen", [])) if dedup else None,
+        "last_ts": ckpt.get("last_ts"),
+        "event_no": ckpt.get("event_no", 0),
+    }
+
+    cursor = {k: ckpt[k] for k in ("offset", "last_start", "last_hash")}
+    with open(filepath, "rb") as src, open(outpath, out_mode) as out:
+        src.seek(cursor["offset"])
+        lines = read_complete_lines(src, cursor)
+        if fmt != "jsonl" and status == "rebuilt":
+            out.write(COMPACT_LEGEND + "\n")
+        if tier is None and fmt == "jsonl" and not dedup:
+            for line in lines:
+                out.write(line)
+        else:
+            limits, aggressive = tier or (None, False)
+            if fmt != "jsonl":
+                limits = compact_limits(limits)
+            for line in prune_lines(lines, limits, aggressive, state, fmt):
+                out.write(line + "\n")
+            if state["pruned_count"] > 0:
+                out.write(
+                    f"[... {state['pruned_count']} consecutive exploratory "
+                    "results pruned ...]\n"
+                )
+
+    ckpt = {
+        "version": PRUNER_VERSION,
+        "source": os.path.abspath(filepath),
+        "mode": mode,
+        "offset": cursor["offset"],
+        "last_start": cursor["last_start"],
+        "last_hash": cursor["last_hash"],
+        "prev_was_explore": state["prev_was_explore"],
+        "dedup": dedup,
+        "seen": list(state["seen"].items()) if dedup else [],
+        "format": fmt,
+        "last_ts": state["last_ts"],
+        "event_no": state["event_no"],
+        "out_size": os.path.getsize(outpath),
+    }
+    tmp_path = f"{ckpt_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(ckpt, f)
+    os.replace(tmp_path, ckpt_path)
+    return status
+
+
+def source_ident(filepath):
+    """Identity of a source file's current contents: path, size and mtime."""
+    st = os.stat(filepath)
+    return {
+        "path": os.path.abspath(filepath),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "version": PRUNER_VERSION,
+    }
+
+
+def cache_key(filepath, target_bytes=None, dedup=False, fmt="jsonl"):
+    """Content-address a pruned output by source identity and pruning params."""
+    ident = {
+        **source_ident(filepath),
+        "target_bytes": target_bytes,
+        "dedup": dedup,
+        "format": fmt,
+    }
+    return hashlib.sha256(json.dumps(ident, sort_keys=True).encode()).hexdigest()
+
+
+def stats_cache_key(filepath, dedup=False, workflow=None, fmt="jsonl"):
+    """Content-address collect_stats() results by source identity and options."""
+    ident = {
+        **source_ident(filepath),
+        "stats": True,
+        "dedup": dedup,
+        "workflow": workflow,
+        "format": fmt,
+    }
+    return hashlib.sha256(json.dumps(ident, sort_keys=True).encode()).hexdigest()
+
+
+def collect_stats_cached(filepath, cache_dir=None, dedup=False, workflow=None,
+                         fmt="jsonl"):
+    """collect_stats(), reusing a result cached in cache_dir for the same
+    unchanged source and options. Entries share the output cache's eviction."""
+    if cache_dir is None:
+        return collect_stats(filepath, dedup=dedup, workflow=workflow, fmt=fmt)
+
+    cache_path = os.path.join(
+        cache_dir, stats_cache_key(filepath, dedup, workflow, fmt) + ".stats" + CACHE_SUFFIX
+    )
+    try:
+        with open(cache_path, "r") as f:
+            stats = json.load(f)
+        # JSON object keys are strings; histograms are keyed by length
+        for name in ("hist", "explore_hist"):
+            stats[name] = {
+                key: {int(n): count for n, count in counts.items()}
+                for key, counts in stats[name].items()
+            }
+        os.utime(cache_path)  # mark as recently used for eviction
+        return stats
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    stats = collect_stats(filepath, dedup=dedup, workflow=workflow, fmt=fmt)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f, separators=(",", ":"))
+    os.replace(tmp_path, cache_path)
+    return stats
+
+
+def evict_cache(cache_dir, max_bytes=CACHE_MAX_BYTES, max_age_days=CACHE_MAX_AGE_DAYS):
+    """Drop entries unused for max_age_days, then least recently used until
+    the cache fits in max_bytes. Returns the number of entries removed."""
+    try:
+        names = [n for n in os.listdir(cache_dir) if n.endswith(CACHE_SUFFIX)]
+    except FileNotFoundError:
+        return 0
+
+    entries = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()  # oldest (least recently used) first
+
+    cutoff = time.time() - max_age_days * 86400
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def prune_to_file(filepath, outdir, target_bytes=None, cache_dir=None,
+                  incremental=False, dedup=False, stats=None, fmt="jsonl"):
+    """Prune one session file into outdir.
+
+    With incremental set, resume from the checkpoint next to the output (see
+    prune_incremental); the cache is not used. Otherwise, with cache_dir set,
+    a previously pruned copy with the same cache key is reused instead of
+    re-pruning. Returns (orig_size, new_size, outpath, status) where status
+    is None, 'cached', 'incremental' or 'rebuilt'.
+    """
+    orig_size = os.path.getsize(filepath)
+    outpath = os.path.join(outdir, os.path.basename(filepath) + ".pruned")
+
+    if incremental:
+        status = prune_incremental(filepath, outpath, dedup=dedup, fmt=fmt)
+        return orig_size, os.path.getsize(outpath), outpath, status
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(
+            cache_dir, cache_key(filepath, target_bytes, dedup, fmt) + CACHE_SUFFIX
+        )
+        if os.path.exists(cache_path):
+            shutil.copyfile(cache_path, outpath)
+            os.utime(cache_path)  # mark as recently used for eviction
+            return orig_size, os.path.getsize(outpath), outpath, "cached"
+
+    result = prune_transcript(
+        filepath, target_bytes=target_bytes, dedup=dedup, stats=stats, fmt=fmt
+    )
+    with open(outpath, "w") as f:
+        f.write(result)
+
+    if cache_path is not None:
+        # Write-then-rename so concurrent workers never read a partial entry
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        shutil.copyfile(outpath, tmp_path)
+        os.replace(tmp_path, cache_path)
+
+    return orig_size, os.path.getsize(outpath), outpath, None
+
+
+def map_files(func, filepaths, jobs=1, per_file=None, **options):
+    """Run func(filepath, **options) for each file, optionally in a worker pool.
+
+    Files are submitted largest first so one big transcript does not start
+    last and stretch the wall-clock time. per_file maps a filepath to extra
+    keyword options for that file only. Results come back as a list in the
+    original argument order; each entry is (filepath, outcome) where outcome
+    is func's return value or the exception that file raised.
+    """
+    def size_of(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def options_for(path):
+        return {**options, **(per_file or {}).get(path, {})}
+
+    order = sorted(filepaths, key=size_of, reverse=True)
+    outcomes = {}
+
+    if jobs <= 1 or len(filepaths) <= 1:
+        for filepath in order:
+            try:
+                outcomes[filepath] = func(filepath, **options_for(filepath))
+            except Exception as e:
+                outcomes[filepath] = e
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                fp: pool.submit(func, fp, **options_for(fp))
+                for fp in order
+            }
+            for filepath, future in futures.items():
+                try:
+                    outcomes[filepath] = future.result()
+                except Exception as e:
+                    outcomes[filepath] = e
+
+    return [(fp, outcomes[fp]) for fp in filepaths]
+
+
+def run_batch(filepaths, outdir, jobs=1, per_file=None, **options):
+    """Prune many files with prune_to_file(); see map_files() for ordering."""
+    return map_files(
+        prune_to_file, filepaths, jobs=jobs, per_file=per_file,
+        outdir=outdir, **options,
+    )
+
+
+def relevance_weight(stats):
+    """Budget weight of a session: grows with log2 of its workflow mentions."""
+    return 1 + math.log2(1 + stats["mentions"])
+
+
+def allocate_budget(stats_by_file, total_bytes):
+    """Split total_bytes across files, favouring relevant sessions.
+
+    Every file first gets its floor (the smallest output the tightest limits
+    can reach), so no share is wasted on a file that cannot get that small.
+    The rest is handed out in proportion to relevance_weight(), but a file
+    never gets more than it needs (its size with metadata dropped and
+    nothing truncated); what it leaves over goes to the others. A file
+    whose share covers that need is then pruned without truncation (see
+    prune_transcript), so small sessions stay whole. Returns
+    {filepath: share_in_bytes}.
+    """
+    floors = {}
+    needs = {}
+    for fp, stats in stats_by_file.items():
+        needs[fp] = min(stats["size"], untruncated_size(stats))
+        floors[fp] = min(needs[fp], estimate_size(stats, scale_limits(0), True))
+
+    shares = dict(floors)
+    remaining = total_bytes - sum(floors.values())
+    active = {fp for fp in stats_by_file if needs[fp] > floors[fp]}
+    while active and remaining > 0:
+        weights = {fp: relevance_weight(stats_by_file[fp]) for fp in active}
+        total_weight = sum(weights.values())
+        satisfied = [
+            fp for fp in active
+            if remaining * weights[fp] / total_weight >= needs[fp] - floors[fp]
+        ]
+        if not satisfied:
+            for fp in active:
+                shares[fp] += int(remaining * weights[fp] / total_weight)
+            break
+        for fp in satisfied:
+            remaining -= needs[fp] - floors[fp]
+            shares[fp] = needs[fp]
+            active.discard(fp)
+    return shares
+
+
 def main():
-    if len(sys.argv) < 3:
-        print(f"Usage: {sys.argv[0]} <output_dir> <session_file> [...]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Prune Claude Code session transcripts for Nash analysis."
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help="number of files to prune concurrently (default: 1)",
+    )
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument(
+        "--target-tokens", type=int,
+        help="prune each file just enough to fit this many tokens (approx.)",
+    )
+    budget.add_argument(
+        "--target-bytes", type=int,
+        help="prune each file just enough to fit this many bytes",
+    )
+    budget.add_argument(
+        "--total-tokens", type=int,
+        help="one budget (tokens, approx.) shared by all files by relevance",
+    )
+    budget.add_argument(
+        "--total-bytes", type=int,
+        help="one budget (bytes) shared by all files by relevance",
+    )
+    parser.add_argument(
+        "--workflow",
+        help="with a total budget: favour sessions that mention this workflow",
+    )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="where to keep reusable pruned outputs (default: tmp/cache)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="always re-prune and do not touch the cache",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="append only events added since the last run (live sessions)",
+    )
+    parser.add_argument(
+        "--dedup", action="store_true",
+        help="replace repeated tool inputs/results with a back-reference",
+    )
+    parser.add_argument(
+        "--format", dest="fmt", choices=FORMATS, default="jsonl",
+        help="output format (default: jsonl, the original event lines)",
+    )
+    parser.add_argument("outdir", metavar="output_dir")
+    parser.add_argument("files", metavar="session_file", nargs="+")
+    args = parser.parse_args()
+
+    target_bytes = args.target_bytes
+    if args.target_tokens is not None:
+        target_bytes = args.target_tokens * BYTES_PER_TOKEN
+    total_bytes = args.total_bytes
+    if args.total_tokens is not None:
+        total_bytes = args.total_tokens * BYTES_PER_TOKEN
+    if args.incremental and (target_bytes is not None or total_bytes is not None):
+        parser.error("--incremental cannot be combined with a budget")
+    if args.workflow and total_bytes is None:
+        parser.error("--workflow only applies with --total-tokens/--total-bytes")
+
+    os.makedirs(args.outdir, exist_ok=True)
+
+    # Duplicate paths would race on the same output file
+    filepaths = list(dict.fromkeys(args.files))
+
+    started = time.monotonic()
+    cache_dir = None if args.no_cache else args.cache_dir
 
-    outdir = sys.argv[1]
-    os.makedirs(outdir, exist_ok=True)
+    jobs = max(1, args.jobs)
 
-    for filepath in sys.argv[2:]:
-        result = prune_transcript(filepath)
-        outpath = os.path.join(outdir, os.path.basename(filepath) + ".pruned")
-        with open(outpath, "w") as f:
-            f.write(result)
-        orig_size = os.path.getsize(filepath)
-        new_size = len(result)
+    # Global budget: one statistics pass over every file (cached like the
+    # outputs, so unchanged files are not re-read), split the budget, then
+    # prune each file to its share reusing those stats
+    per_file = {}
+    stats_failures = {}
+    if total_bytes is not None:
+        for filepath, outcome in map_files(
+            collect_stats_cached, filepaths, jobs=jobs, cache_dir=cache_dir,
+            dedup=args.dedup, workflow=args.workflow, fmt=args.fmt,
+        ):
+            if isinstance(outcome, Exception):
+                stats_failures[filepath] = outcome
+            else:
+                per_file[filepath] = {"stats": outcome}
+        shares = allocate_budget(
+            {fp: opts["stats"] for fp, opts in per_file.items()}, total_bytes
+        )
+        for filepath, share in shares.items():
+            per_file[filepath]["target_bytes"] = share
+
+    batch = run_batch(
+        [fp for fp in filepaths if fp not in stats_failures], args.outdir,
+        jobs=jobs, per_file=per_file,
+        target_bytes=target_bytes, cache_dir=cache_dir,
+        incremental=args.incremental, dedup=args.dedup, fmt=args.fmt,
+    )
+    elapsed = time.monotonic() - started
+    outcomes = {**dict(batch), **stats_failures}
+    results = [(fp, outcomes[fp]) for fp in filepaths]
+
+    total_in = 0
+    total_out = 0
+    failures = 0
+    for filepath, outcome in results:
+        name = os.path.basename(filepath)
+        if isinstance(outcome, Exception):
+            failures += 1
+            print(f"{name}: FAILED ({type(outcome).__name__}: {outcome})")
+            continue
+        orig_size, new_size, outpath, status = outcome
+        total_in += orig_size
+        total_out += new_size
         ratio = (1 - new_size / orig_size) * 100 if orig_size > 0 else 0
         print(
-            f"{os.path.basename(filepath)}: "
+            f"{name}: "
             f"{orig_size / 1_000_000:.1f}MB -> {new_size / 1_000_000:.1f}MB "
             f"({ratio:.0f}% reduction)"
+            + (f" [{status}]" if status else "")
         )
         print(f"  -> {outpath}")
+        budget_bytes = per_file.get(filepath, {}).get("target_bytes", target_bytes)
+        if total_bytes is not None:
+            mentions = per_file[filepath]["stats"]["mentions"]
+            print(
+                f"  share: {budget_bytes / 1_000_000:.2f}MB"
+                + (f" ({mentions} mentions of {args.workflow})" if args.workflow else "")
+            )
+        if budget_bytes is not None and new_size > budget_bytes:
+            print(f"  ! still over budget ({budget_bytes / 1_000_000:.1f}MB)")
+
+    if len(results) > 1:
+        throughput = total_in / 1_000_000 / elapsed if elapsed > 0 else 0
+        print(
+            f"Total: {len(results) - failures}/{len(results)} files, "
+            f"{total_in / 1_000_000:.1f}MB -> {total_out / 1_000_000:.1f}MB "
+            f"in {elapsed:.1f}s ({throughput:.1f}MB/s)"
+        )
+        if total_bytes is not None and total_out > total_bytes:
+            print(f"  ! total over budget ({total_bytes / 1_000_000:.1f}MB)")
+
+    if cache_dir is not None:
+        evict_cache(cache_dir)
+
+    if failures:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
+    # Shared profiling helper lives in .claude/scripts/ (opt-in, see qol_profile.py)
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+    try:
+        from qol_profile import profiled
+    except ImportError:
+        from contextlib import nullcontext as profiled
+    with profiled("prune_transcript"):
+        main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Nash session index — a small, incrementally updated index of Claude Code
+session transcripts, so discovery does not have to grep every JSONL file.
+
+Usage:
+    python3 session_index.py update [--projects-dir DIR] [--index FILE]
+    python3 session_index.py query [--workflow NAME] [--project TEXT | --cwd PATH]
+                                   [--limit N] [--json] [--no-update]
+
+For each session the index stores its project, working directory, first and
+last event timestamps, byte size, line count and the slash-commands / skills
+invoked in it. Updates only re-read files whose size or mtime changed; a
+file that only grew (a live session) is scanned from where the last update
+stopped. `query` runs an update first unless --no-update is given.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+
+INDEX_VERSION = 1
+
+DEFAULT_PROJECTS_DIR = os.path.join(os.path.expanduser("~"), ".claude", "projects")
+DEFAULT_INDEX = os.path.join(os.path.expanduser("~"), ".claude", "nash-session-index.json")
+
+# Cheap byte-level prefilters: only lines that may mention a workflow are parsed
+WORKFLOW_HINTS = (b"<command-name>", b'"Skill"', b'"SlashCommand"')
+COMMAND_TAG_RE = re.compile(r"<command-name>\s*/?([^<\s]+)\s*</command-name>")
+TIMESTAMP_RE = re.compile(rb'"timestamp"\s*:\s*"([^"]+)"')
+CWD_RE = re.compile(rb'"cwd"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def encode_project_dir(path):
+    """Claude Code's projects/ directory name for a working directory."""
+    return re.sub(r"[^A-Za-z0-9]", "-", path)
+
+
+def normalize_workflow(name):
+    """Strip the leading slash and any arguments from a workflow name."""
+    return (name or "").strip().lstrip("/").split(" ")[0]
+
+
+def workflows_in_event(event):
+    """Return workflow names invoked by one transcript event."""
+    found = set()
+    msg = event.get("message", {})
+    content = msg.get("content", "") if isinstance(msg, dict) else ""
+
+    texts = []
+    if isinstance(content, str):
+        texts.append(content)
+    elif isinstance(content, list):
+        for item in content:
+            if not isinstance(item, dict):
+                continue
+            if item.get("type") == "text" and isinstance(item.get("text"), str):
+                texts.append(item["text"])
+            elif item.get("type") == "tool_use":
+                inp = item.get("input", {})
+                if not isinstance(inp, dict):
+                    continue
+                # Skill tool: {"skill": "nash"}; SlashCommand tool: {"command": "/foo args"}
+                if item.get("name") == "Skill":
+                    found.add(normalize_workflow(inp.get("skill") or inp.get("command")))
+                elif item.get("name") == "SlashCommand":
+                    found.add(normalize_workflow(inp.get("command")))
+
+    if event.get("type") == "user":
+        for text in texts:
+            for match in COMMAND_TAG_RE.finditer(text):
+                found.add(normalize_workflow(match.group(1)))
+
+    found.discard("")
+    return found
+
+
+def scan_session(filepath, entry=None):
+    """Scan a session file, resuming from entry's offset when possible.
+
+    Returns a fresh index entry. entry is a previous index entry for the
+    same path; it is only resumed from if the source still contains the
+    exact line the previous scan ended on.
+    """
+    st = os.stat(filepath)
+    if entry and not can_resume(filepath, st.st_size, entry):
+        entry = None
+
+    if entry:
+        cursor = {k: entry[k] for k in ("offset", "last_start", "last_hash")}
+        workflows = set(entry["workflows"])
+        first_ts, last_ts = entry["first_ts"], entry["last_ts"]
+        cwd, lines = entry["cwd"], entry["lines"]
+    else:
+        cursor = {"offset": 0, "last_start": 0, "last_hash": None}
+        workflows = set()
+        first_ts = last_ts = cwd = None
+        lines = 0
+
+    with open(filepath, "rb") as f:
+        f.seek(cursor["offset"])
+        while True:
+            start = f.tell()
+            raw = f.readline()
+            # Stop at a trailing partial line; a live session may be mid-write
+            if not raw.endswith(b"\n"):
+                break
+            cursor["offset"] = start + len(raw)
+            cursor["last_start"] = start
+            cursor["last_hash"] = hashlib.sha256(raw).hexdigest()
+            lines += 1
+
+            ts = TIMESTAMP_RE.search(raw)
+            if ts:
+                stamp = ts.group(1).decode("utf-8", errors="replace")
+                first_ts = first_ts or stamp
+                last_ts = stamp
+            if cwd is None:
+                m = CWD_RE.search(raw)
+                if m:
+                    cwd = json.loads(b'"' + m.group(1) + b'"')
+            if any(hint in raw for hint in WORKFLOW_HINTS):
+                try:
+                    workflows |= workflows_in_event(json.loads(raw))
+                except json.JSONDecodeError:
+                    pass
+
+    return {
+        "project": os.path.basename(os.path.dirname(filepath)),
+        "cwd": cwd,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "lines": lines,
+        "workflows": sorted(workflows),
+        "offset": cursor["offset"],
+        "last_start": cursor["last_start"],
+        "last_hash": cursor["last_hash"],
+    }
+
+
+def can_resume(filepath, size, entry):
+    """True if filepath still starts with everything entry has scanned."""
+    if size < entry.get("offset", 0):
+        return False
+    if not entry.get("last_hash"):
+        return entry.get("offset", 0) == 0
+    with open(filepath, "rb") as f:
+        f.seek(entry["last_start"])
+        raw = f.read(entry["offset"] - entry["last_start"])
+    return hashlib.sha256(raw).hexdigest() == entry["last_hash"]
+
+
+def load_index(index_path):
+    try:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"version": INDEX_VERSION, "sessions": {}}
+    if index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "sessions": {}}
+    return index
+
+
+def save_index(index, index_path):
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+
+def update_index(projects_dir, index_path):
+    """Bring the index in line with projects_dir. Returns (index, scanned, removed)."""
+    index = load_index(index_path)
+    sessions = index["sessions"]
+    seen = set()
+    scanned = 0
+
+    try:
+        project_names = sorted(os.listdir(projects_dir))
+    except FileNotFoundError:
+        project_names = []
+
+    for project in project_names:
+        project_dir = os.path.join(projects_dir, project)
+        if not os.path.isdir(project_dir):
+            continue
+        for name in os.listdir(project_dir):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(project_dir, name)
+            seen.add(path)
+            try:
+                st = os.stat(path)
+                entry = sessions.get(path)
+                if (
+                    entry
+                    and entry["size"] == st.st_size
+                    and entry["mtime_ns"] == st.st_mtime_ns
+                ):
+                    continue
+                sessions[path] = scan_session(path, entry)
+                scanned += 1
+            except OSError as e:
+                print(f"Warning: could not index {path}: {e}", file=sys.stderr)
+
+    removed = [path for path in sessions if path not in seen]
+    for path in removed:
+        del sessions[path]
+
+    if scanned or removed:
+        save_index(index, index_path)
+    return index, scanned, len(removed)
+
+
+def matches_workflow(entry, target):
+    """Match a workflow by name, also accepting namespaced names (a:b:name)."""
+    target = normalize_workflow(target)
+    return any(w == target or w.endswith(":" + target) for w in entry["workflows"])
+
+
+def matches_cwd(entry, cwd):
+    """Exact project match: same recorded cwd, or the same encoded projects/ dir."""
+    cwd = os.path.abspath(os.path.expanduser(cwd))
+    return entry.get("cwd") == cwd or entry["project"] == encode_project_dir(cwd)
+
+
+def query_index(index, workflow=None, project=None, limit=None, cwd=None):
+    """Return [(path, entry)] newest first, filtered by workflow/project/cwd.
+
+    project is a case-insensitive substring of the project name or cwd;
+    cwd selects exactly one project.
+    """
+    results = []
+    for path, entry in index["sessions"].items():
+        if workflow and not matches_workflow(entry, workflow):
+            continue
+        if cwd and not matches_cwd(entry, cwd):
+            continue
+        if project:
+            haystack = f"{entry['project']} {entry.get('cwd') or ''}".lower()
+            if project.lower() not in haystack:
+                continue
+        results.append((path, entry))
+    results.sort(key=lambda r: (r[1]["last_ts"] or "", r[1]["mtime_ns"]), reverse=True)
+    return results[:limit] if limit else results
+
+
+def format_results(results):
+    """Group results by project, in the layout the Nash menus use."""
+    groups = {}
+    for path, entry in results:
+        groups.setdefault(entry["project"], []).append((path, entry))
+
+    out = []
+    for project, items in groups.items():
+        cwd = items[0][1].get("cwd")
+        label = os.path.basename(cwd) if cwd else project
+        out.append(f"{label} ({cwd or project}):")
+        for path, entry in items:
+            when = (entry["last_ts"] or "")[:16].replace("T", " ") or "unknown"
+            workflows = ", ".join("/" + w for w in entry["workflows"]) or "-"
+            out.append(
+                f"  {when} | {entry['lines']} lines | "
+                f"{entry['size'] / 1_000_000:.1f}MB | {workflows}"
+            )
+            out.append(f"    {path}")
+    return "\n".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index Claude Code sessions for Nash.")
+    parser.add_argument("--projects-dir", default=DEFAULT_PROJECTS_DIR)
+    parser.add_argument("--index", default=DEFAULT_INDEX)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("update", help="refresh the index")
+
+    q = sub.add_parser("query", help="list indexed sessions")
+    q.add_argument("--workflow", help="only sessions that invoked this workflow")
+    scope = q.add_mutually_exclusive_group()
+    scope.add_argument("--project", help="only sessions whose project/cwd contains this")
+    scope.add_argument("--cwd", help="only sessions of the project at exactly this path")
+    q.add_argument("--limit", type=int, help="at most N sessions (newest first)")
+    q.add_argument("--json", action="store_true", help="machine-readable output")
+    q.add_argument("--no-update", action="store_true", help="skip the refresh")
+
+    args = parser.parse_args()
+
+    if args.command == "update":
+        started = time.monotonic()
+        index, scanned, removed = update_index(args.projects_dir, args.index)
+        print(
+            f"Indexed {len(index['sessions'])} sessions "
+            f"({scanned} scanned, {removed} removed) "
+            f"in {time.monotonic() - started:.2f}s -> {args.index}"
+        )
+        return
+
+    if args.no_update:
+        index = load_index(args.index)
+    else:
+        index, _, _ = update_index(args.projects_dir, args.index)
+
+    results = query_index(index, args.workflow, args.project, args.limit, args.cwd)
+    if args.json:
+        print(json.dumps(
+            [{"path": path, **{k: e[k] for k in (
+                "project", "cwd", "first_ts", "last_ts", "size", "lines", "workflows"
+            )}} for path, e in results],
+            indent=2,
+        ))
+    elif results:
+        print(format_results(results))
+    else:
+        print("No matching sessions.")
+
+
+if __name__ == "__main__":
+    main()
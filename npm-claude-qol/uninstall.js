@@ -39,7 +39,9 @@ const INSTALLED_FILES = {
     // auto_approve_safe.py is intentionally excluded — removing it breaks PreToolUse hooks
     'auto_approve_safe.rules.json',
     'auto_approve_safe_rules_check.py',
+    'auto_approve_safe_log_compact.py',
     'context-monitor.py',
+    'qol_profile.py',
   ],
   commands: [
     'optimize-auto-approve-hook.md',
@@ -51,6 +53,7 @@ const INSTALLED_FILES = {
     'OPUS-ANALYSIS-PROMPT.md',
     'nash-sources.example.yaml',
     'prune_transcript.py',
+    'session_index.py',
     // nash-learnings.md is intentionally excluded — it's user-generated at runtime
     // tmp/ directory is intentionally excluded — may contain in-progress work
   ],